@@ -1,20 +1,35 @@
 """
 algotrader
 """
-import abc
+import functools
+import io
 import os
+import sys
+import time
 import warnings
-from abc import ABC
-import openai
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+import numpy as np
 import yfinance as yf
 import pandas as pd
 import json
+from pyarrow import ArrowException
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Ignore any warnings that might occur while fetching the stock data
+warnings.filterwarnings("ignore", category=FutureWarning)
 
 
 class OpenAIAPI:
     """
     OpenAIAPI class to manage the OpenAI API key.
     """
+    __slots__ = ()
     API_KEY_ENV_VAR = 'OPENAI_API_KEY'
 
     def __init__(self):
@@ -24,130 +39,178 @@ class OpenAIAPI:
         """
         Load the OpenAI API key from the environment variable.
         """
+        # openai is slow to import, so it is only imported once the API is actually needed
+        import openai
+
         api_key = os.getenv(self.API_KEY_ENV_VAR)
         assert api_key is not None, f"Missing {self.API_KEY_ENV_VAR} in environment variables"
         openai.api_key = api_key
 
 
-class StockAPI(abc.ABC):
+@functools.lru_cache(maxsize=None)
+def get_openai_api():
     """
-    Abstract Base Class for all APIs
+    Returns the shared OpenAIAPI instance, creating it on the first call.
     """
+    return OpenAIAPI()
 
-    def __init__(self):
-        pd.set_option('display.max_rows', None)
-        pd.set_option('display.max_columns', None)
-        pd.set_option('display.width', None)
-        pd.set_option('display.max_colwidth', None)
 
-    @abc.abstractmethod
-    def fetch_and_format_stock_info(self, ticker_symbol: str):
+class FileCache:
+    """
+    FileCache class to keep fetched stock data on disk between runs.
+    """
+    __slots__ = ('cache_dir', 'ttl')
+
+    def __init__(self, cache_dir='.cache', ttl=timedelta(hours=24)):
         """
-        Fetch and format stock information
-        :param ticker_symbol:
+        Initialize the FileCache with a cache directory and a time to live.
+        :param cache_dir: Directory the cached DataFrames are written to.
+        :param ttl: How long a cached DataFrame is considered fresh.
         """
-        print(f"Fetching and formatting stock information for {ticker_symbol}")
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
 
-    @abc.abstractmethod
-    def print_formatted_stock_actions(self, actions_df):
+    def get_paths(self, ticker_symbol, endpoint):
         """
-        Print formatted stock actions
-        :param actions_df:
+        Returns the paths of the parquet data file and its JSON metadata sidecar.
         """
-        pass
+        file_name = f"{ticker_symbol}_{endpoint}"
+        return self.cache_dir / f"{file_name}.parquet", self.cache_dir / f"{file_name}.json"
 
+    def get(self, ticker_symbol, endpoint):
+        """
+        Loads a cached DataFrame.
+        :return: The cached DataFrame, or None if it is missing, unreadable or older than the TTL.
+        """
+        data_path, meta_path = self.get_paths(ticker_symbol, endpoint)
+        try:
+            with open(meta_path) as file:
+                timestamp = json.load(file)['timestamp']
+            if time.time() - timestamp > self.ttl.total_seconds():
+                return None
+            return pd.read_parquet(data_path)
+        except (OSError, ValueError, KeyError, ArrowException):
+            # A missing or corrupt sidecar or data file (json and pyarrow raise ValueErrors) is a miss
+            return None
 
-class BaseStockAPI(StockAPI, ABC):
+    def set(self, ticker_symbol, endpoint, df):
+        """
+        Writes a DataFrame to the cache.
+        """
+        data_path, meta_path = self.get_paths(ticker_symbol, endpoint)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # The sidecar marks a complete data file: an old one is removed before the data is rewritten,
+        # and the new one is only written once the data file is complete
+        meta_path.unlink(missing_ok=True)
+        df.to_parquet(data_path)
+        with open(meta_path, 'w') as file:
+            json.dump({'timestamp': time.time()}, file)
+
+
+# Stock APIs are duck typed. A backend used by PortfolioManager must provide:
+#   format_stock_info(ticker_symbol) -> the formatted output for the ticker, as a string
+class YFinanceAPI:
     """
-    BaseStockAPI class that implements common methods for YFActions and YFinanceAPI
+    YFinanceAPI class to fetch and format stock Dividends and Stock Splits from yfinance.
     """
+    __slots__ = ('ticker_symbol', 'cache')
 
-    def __init__(self):
-        super().__init__()
-        self.organized_actions = None
-        self.current_ticker_symbol = None
+    def __init__(self, ticker: str = None, cache: FileCache = None):
+        self.ticker_symbol = ticker
+        self.cache = cache or FileCache()
 
-    def print_formatted_stock_actions(self, actions_df):
+    def fetch_and_format_stock_info(self, ticker_symbol: str):
         """
-        Prints the stock actions once they've been formatted.
+        Fetch and format stock information.
         """
-        if self.current_ticker_symbol:
-            print(f"Ticker: {self.current_ticker_symbol}")
-        actions_df = actions_df[['type', 'date', 'value']]
-        print(actions_df)
+        sys.stdout.write(self.format_stock_info(ticker_symbol))
 
-    def get_organized_stock_actions(self, ticker_symbol: str):
+    def format_stock_info(self, ticker_symbol: str):
         """
-        Organizes the stock actions based.
+        Fetch the stock information and format it without printing it.
+        A failed fetch is reported in the output of its ticker, so one bad symbol doesn't cost a whole portfolio report.
+        :param ticker_symbol:
+        :return: The formatted output for the ticker.
         """
-        actions = ticker_symbol.actions
-        if actions.empty:
-            return None
-        self.organized_actions = {}
-        for index, row in actions.iterrows():
-            for col_name in actions.columns:
-                if action_value := row[col_name]:
-                    self.organized_actions.setdefault(col_name, []).append({'date': index.strftime('%Y-%m-%d'), 'value': action_value})
-        return self.organized_actions or None
+        buffer = io.StringIO()
+        print(f"Fetching and formatting stock information for {ticker_symbol}", file=buffer)
+        try:
+            ticker = yf.Ticker(ticker_symbol)
+            buffer.write(self.handle_stock_actions(ticker, ticker_symbol))
+        except Exception as error:
+            print(f"Couldn't fetch the stock information for {ticker_symbol}: {error}", file=buffer)
+        return buffer.getvalue()
 
-    def create_stock_records_df(self, actions_df):
+    def get_stock_actions(self, ticker, ticker_symbol):
         """
-        Creates a DataFrame to hold all the stock records.
+        Gets the actions of the provided ticker, from the cache if it holds a fresh copy.
+        :param ticker:
+        :param ticker_symbol:
         """
-        for action_type, records in self.organized_actions.items():
-            temp_df = pd.DataFrame(records)
-            temp_df['type'] = action_type
-            actions_df = pd.concat([actions_df, temp_df], ignore_index=True)
-        return actions_df
-
-
-class YFActions(BaseStockAPI):
-    """
-    YFActions class to fetch and format stock Dividends and Stock Splits from yfinance.
-    """
-
-    def __init__(self):
-        super().__init__()
-        self.ignore_warnings()
-
-    @staticmethod
-    def ignore_warnings():
+        actions = self.cache.get(ticker_symbol, 'actions')
+        if actions is None:
+            actions = ticker.actions
+            # yfinance returns an empty frame, or a bare Series, when the fetch fails or finds no history.
+            # Those aren't cached, so a failed fetch doesn't hide the real actions until the TTL runs out.
+            if isinstance(actions, pd.DataFrame) and not actions.empty:
+                try:
+                    self.cache.set(ticker_symbol, 'actions', actions)
+                except (OSError, ValueError, ArrowException):
+                    # The cache is only a speedup, the fetched actions are returned even if they can't be written
+                    pass
+        return actions
+
+    def get_organized_stock_actions(self, actions):
         """
-        Method to ignore any warnings that might occur while fetching the stock data.
+        Organizes the stock actions into a DataFrame with one record per non-zero action, grouped by type.
+        The types are ordered by the date of their first action.
+        Keeps no state on the instance, so it is safe to call from several threads.
+        :param actions: The actions DataFrame of a ticker.
+        :return: The type, date and value of each action, or None if there are none.
         """
-        warnings.filterwarnings("ignore", category=FutureWarning)
-
-    def fetch_and_format_stock_info(self, ticker_symbol: str):
-        print(f"Ticker: {ticker_symbol}")
-        ticker = yf.Ticker(ticker_symbol)
-        self.handle_stock_actions(ticker, ticker_symbol)
+        if actions.empty:
+            return None
+        # Usually a view: live yfinance actions are a single float block, frames read from the cache may not be
+        values = actions.to_numpy(copy=False)
+        # Scan the transposed values so the records come out grouped by action type
+        cols, rows = np.nonzero(values.T)
+        if cols.size == 0:
+            return None
+        # Order the type groups by their first action, keeping the column order for ties
+        first_rows = np.full(values.shape[1], values.shape[0])
+        np.minimum.at(first_rows, cols, rows)
+        order = np.argsort(first_rows[cols], kind='stable')
+        cols, rows = cols[order], rows[order]
+        return pd.DataFrame({
+            'type': actions.columns.to_numpy()[cols],
+            'date': actions.index.strftime('%Y-%m-%d').to_numpy()[rows],
+            'value': values[rows, cols],
+        })
 
     def handle_stock_actions(self, ticker, ticker_symbol):
         """
         Handles the stock actions for the provided ticker.
+        The output is buffered instead of printed, so tickers handled in parallel don't interleave.
         :param ticker:
         :param ticker_symbol:
+        :return: The formatted output for the ticker.
         """
-        if self.get_organized_stock_actions(ticker):
-            actions_df = self.create_stock_records_df(pd.DataFrame())
-            if not actions_df.empty:
-                self.print_formatted_stock_actions(actions_df)
+        actions = self.get_stock_actions(ticker, ticker_symbol)
+        actions_df = self.get_organized_stock_actions(actions)
+        buffer = io.StringIO()
+        print(f"Ticker: {ticker_symbol}", file=buffer)
+        if actions_df is not None:
+            self.print_formatted_stock_actions(actions_df, buffer)
         else:
-            print(f"No actions found for ticker {ticker_symbol}.")
-
+            print(f"No actions found for ticker {ticker_symbol}.", file=buffer)
+        return buffer.getvalue()
 
-class YFinanceAPI(BaseStockAPI):
-    def __init__(self, ticker: str = None):
-        super().__init__()
-        self.ticker_symbol = ticker
-        self.yf_actions = YFActions()
-
-    def fetch_and_format_stock_info(self, ticker_symbol: str):
+    def print_formatted_stock_actions(self, actions_df, buffer=None):
         """
-        Fetch and format stock information using YFActions.
+        Prints the stock actions once they've been formatted.
+        The DataFrame from get_organized_stock_actions already has its columns in print order.
         """
-        print(f"Fetching and formatting stock information for {ticker_symbol}")
-        self.yf_actions.fetch_and_format_stock_info(ticker_symbol)
+        print(actions_df, file=buffer)
 
     def run(self):
         """
@@ -160,25 +223,32 @@ class PortfolioManager:
     """
     PortfolioManager class to manage a portfolio of stocks.
     """
+    __slots__ = ('portfolio_file', 'stock_api', '_portfolio')
+    MAX_WORKERS = 32
 
     def __init__(self, portfolio_file, stock_api):
         """
         Initialize the PortfolioManager with a portfolio file and a stock API object.
         :param portfolio_file: Path to the portfolio JSON file.
-        :param stock_api: An instance of a StockAPI subclass to fetch stock information.
+        :param stock_api: A stock API object, such as YFinanceAPI, to fetch stock information.
         """
         self.portfolio_file = portfolio_file
         self.stock_api = stock_api
+        self._portfolio = None
 
     def load_portfolio(self):
         """
-        Loads the portfolio from a JSON file (portfolio.json)
+        Loads the portfolio from a JSON file (portfolio.json), using orjson when it is installed.
+        The parsed portfolio is kept, so later calls don't read the file again.
         :return:
         """
+        if self._portfolio is not None:
+            return self._portfolio
         try:
-            with open(self.portfolio_file) as file:
-                portfolio = json.load(file)
+            with open(self.portfolio_file, 'rb') as file:
+                portfolio = orjson.loads(file.read()) if orjson else json.load(file)
             print(f"Portfolio loaded from {self.portfolio_file}")
+            self._portfolio = portfolio
         except FileNotFoundError:
             print(f"Couldn't load the portfolio. No such file: {self.portfolio_file}")
             portfolio = None
@@ -190,16 +260,33 @@ class PortfolioManager:
         for each stock in the portfolio using the provided stock API instance
         """
         portfolio = self.load_portfolio()
+        if not portfolio:
+            return
+
+        ticker_symbols = [stock['ticker'] for stock in portfolio]
+        # Fetching is network bound, so the stocks are checked in parallel
+        with ThreadPoolExecutor(max_workers=min(self.MAX_WORKERS, len(ticker_symbols))) as executor:
+            outputs = list(executor.map(self.stock_api.format_stock_info, ticker_symbols))
+        sys.stdout.write(''.join(outputs))
+        sys.stdout.flush()
+
 
-        for stock in portfolio:
-            self.stock_api.fetch_and_format_stock_info(stock['ticker'])
+def configure_display():
+    """
+    Configure pandas to print the stock DataFrames in full.
+    The options are global, so this only needs to be called once before printing.
+    """
+    pd.set_option('display.max_rows', None)
+    pd.set_option('display.max_columns', None)
+    pd.set_option('display.width', None)
+    pd.set_option('display.max_colwidth', None)
 
 
 def main():
     """
     Main function to show the use of PortfolioManager.
     """
-    openai_api = OpenAIAPI()
+    configure_display()
     stock_api = YFinanceAPI()
     portfolio_manager = PortfolioManager('portfolio.json', stock_api)
     portfolio_manager.check_portfolio()
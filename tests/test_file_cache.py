@@ -0,0 +1,73 @@
+"""
+Tests for FileCache
+"""
+import time
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from main import FileCache
+
+
+@pytest.fixture
+def actions():
+    index = pd.DatetimeIndex(['2023-06-08', '2024-06-10'], name='Date').tz_localize('America/New_York')
+    return pd.DataFrame({'Dividends': [0.04, 0.0], 'Stock Splits': [0.0, 10.0]}, index=index)
+
+
+def test_get_missing_entry_is_a_miss(tmp_path):
+    cache = FileCache(tmp_path)
+    assert cache.get('NVDA', 'actions') is None
+
+
+def test_set_and_get_round_trip(tmp_path, actions):
+    cache = FileCache(tmp_path)
+    cache.set('NVDA', 'actions', actions)
+    pd.testing.assert_frame_equal(cache.get('NVDA', 'actions'), actions)
+
+
+def test_entries_are_kept_per_ticker_and_endpoint(tmp_path, actions):
+    cache = FileCache(tmp_path)
+    cache.set('RHM.DE', 'actions', actions)
+    assert cache.get('RHM.DE', 'history') is None
+    assert cache.get('RHM', 'actions') is None
+
+
+def test_expired_entry_is_a_miss(tmp_path, actions, monkeypatch):
+    cache = FileCache(tmp_path, ttl=timedelta(seconds=1))
+    cache.set('NVDA', 'actions', actions)
+    assert cache.get('NVDA', 'actions') is not None
+    written_at = time.time()
+    monkeypatch.setattr(time, 'time', lambda: written_at + 2)
+    assert cache.get('NVDA', 'actions') is None
+
+
+@pytest.mark.parametrize('sidecar', ['', '{"timestamp": ', '{}'])
+def test_corrupt_sidecar_is_a_miss(tmp_path, actions, sidecar):
+    cache = FileCache(tmp_path)
+    cache.set('NVDA', 'actions', actions)
+    _, meta_path = cache.get_paths('NVDA', 'actions')
+    meta_path.write_text(sidecar)
+    assert cache.get('NVDA', 'actions') is None
+
+
+def test_corrupt_data_file_is_a_miss(tmp_path, actions):
+    cache = FileCache(tmp_path)
+    cache.set('NVDA', 'actions', actions)
+    data_path, _ = cache.get_paths('NVDA', 'actions')
+    data_path.write_bytes(data_path.read_bytes()[:20])
+    assert cache.get('NVDA', 'actions') is None
+
+
+def test_failed_overwrite_leaves_no_fresh_sidecar(tmp_path, actions, monkeypatch):
+    cache = FileCache(tmp_path)
+    cache.set('NVDA', 'actions', actions)
+
+    def fail_to_parquet(self, path):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', fail_to_parquet)
+    with pytest.raises(OSError):
+        cache.set('NVDA', 'actions', actions)
+    assert cache.get('NVDA', 'actions') is None
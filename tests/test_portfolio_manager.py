@@ -0,0 +1,92 @@
+"""
+Tests for PortfolioManager
+"""
+import json
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from main import FileCache, PortfolioManager, YFinanceAPI
+
+
+@pytest.fixture
+def portfolio_file(tmp_path):
+    path = tmp_path / 'portfolio.json'
+    path.write_text(json.dumps([{'ticker': 'NVDA'}, {'ticker': 'RHM.DE'}, {'ticker': 'AMZN'}]))
+    return path
+
+
+def test_check_portfolio_prints_stocks_in_portfolio_order(portfolio_file, monkeypatch, capsys):
+    delays = {'NVDA': 0.2, 'RHM.DE': 0.1, 'AMZN': 0.0}
+
+    def format_stock_info(self, ticker_symbol):
+        # The first stocks finish last, so completion order is the reverse of the portfolio order
+        time.sleep(delays[ticker_symbol])
+        return f"{ticker_symbol}\n"
+
+    monkeypatch.setattr(YFinanceAPI, 'format_stock_info', format_stock_info)
+
+    PortfolioManager(portfolio_file, YFinanceAPI()).check_portfolio()
+
+    assert capsys.readouterr().out.splitlines()[1:] == ['NVDA', 'RHM.DE', 'AMZN']
+
+
+def test_check_portfolio_reports_a_failed_stock_and_keeps_the_rest(portfolio_file, tmp_path, monkeypatch, capsys):
+    def ticker(ticker_symbol):
+        if ticker_symbol == 'RHM.DE':
+            raise ConnectionError('connection reset')
+        return SimpleNamespace(actions=pd.DataFrame())
+
+    monkeypatch.setattr('main.yf.Ticker', ticker)
+
+    PortfolioManager(portfolio_file, YFinanceAPI(cache=FileCache(tmp_path / 'cache'))).check_portfolio()
+
+    output = capsys.readouterr().out
+    assert "No actions found for ticker NVDA." in output
+    assert "Couldn't fetch the stock information for RHM.DE: connection reset" in output
+    assert "No actions found for ticker AMZN." in output
+
+
+@pytest.mark.parametrize('portfolio', ['[]', None])
+def test_check_portfolio_without_stocks_checks_nothing(tmp_path, monkeypatch, portfolio):
+    portfolio_file = tmp_path / 'portfolio.json'
+    if portfolio is not None:
+        portfolio_file.write_text(portfolio)
+    checked = []
+    monkeypatch.setattr(YFinanceAPI, 'format_stock_info', lambda self, ticker_symbol: checked.append(ticker_symbol))
+
+    assert PortfolioManager(portfolio_file, YFinanceAPI()).check_portfolio() is None
+    assert checked == []
+
+
+def test_load_portfolio_reads_the_file_once(portfolio_file):
+    portfolio_manager = PortfolioManager(portfolio_file, YFinanceAPI())
+    portfolio = portfolio_manager.load_portfolio()
+    portfolio_file.unlink()
+
+    assert portfolio_manager.load_portfolio() is portfolio
+
+
+def test_load_portfolio_with_orjson(portfolio_file):
+    pytest.importorskip('orjson')
+    assert PortfolioManager(portfolio_file, YFinanceAPI()).load_portfolio() == [
+        {'ticker': 'NVDA'}, {'ticker': 'RHM.DE'}, {'ticker': 'AMZN'},
+    ]
+
+
+def test_load_portfolio_falls_back_to_json(portfolio_file, monkeypatch):
+    monkeypatch.setattr('main.orjson', None)
+    assert PortfolioManager(portfolio_file, YFinanceAPI()).load_portfolio() == [
+        {'ticker': 'NVDA'}, {'ticker': 'RHM.DE'}, {'ticker': 'AMZN'},
+    ]
+
+
+def test_load_portfolio_does_not_keep_a_missing_portfolio(tmp_path):
+    portfolio_file = tmp_path / 'portfolio.json'
+    portfolio_manager = PortfolioManager(portfolio_file, YFinanceAPI())
+    assert portfolio_manager.load_portfolio() is None
+
+    portfolio_file.write_text('[{"ticker": "NVDA"}]')
+    assert portfolio_manager.load_portfolio() == [{'ticker': 'NVDA'}]
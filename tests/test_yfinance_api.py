@@ -0,0 +1,117 @@
+"""
+Tests for YFinanceAPI
+"""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from main import FileCache, YFinanceAPI
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FileCache(tmp_path)
+
+
+@pytest.fixture
+def stock_api(cache):
+    return YFinanceAPI(cache=cache)
+
+
+@pytest.fixture
+def actions():
+    index = pd.DatetimeIndex(['2024-06-10'], name='Date').tz_localize('America/New_York')
+    return pd.DataFrame({'Dividends': [0.01], 'Stock Splits': [10.0]}, index=index)
+
+
+def test_get_stock_actions_caches_fetched_actions(stock_api, cache, actions):
+    assert stock_api.get_stock_actions(SimpleNamespace(actions=actions), 'NVDA') is actions
+    pd.testing.assert_frame_equal(cache.get('NVDA', 'actions'), actions)
+
+
+def test_get_stock_actions_prefers_the_cache(stock_api, cache, actions):
+    cache.set('NVDA', 'actions', actions)
+    pd.testing.assert_frame_equal(stock_api.get_stock_actions(SimpleNamespace(), 'NVDA'), actions)
+
+
+@pytest.mark.parametrize('failed_actions', [pd.DataFrame(), pd.Series(dtype='float64')])
+def test_get_stock_actions_does_not_cache_failed_fetches(stock_api, cache, failed_actions):
+    assert stock_api.get_stock_actions(SimpleNamespace(actions=failed_actions), 'DELISTED') is failed_actions
+    assert cache.get('DELISTED', 'actions') is None
+
+
+def test_get_stock_actions_survives_an_unwritable_cache(tmp_path, actions):
+    (tmp_path / 'not_a_directory').write_text('')
+    stock_api = YFinanceAPI(cache=FileCache(tmp_path / 'not_a_directory' / 'cache'))
+    assert stock_api.get_stock_actions(SimpleNamespace(actions=actions), 'NVDA') is actions
+
+
+@pytest.mark.parametrize('failed_actions', [pd.DataFrame(), pd.Series(dtype='float64')])
+def test_handle_stock_actions_reports_missing_actions(stock_api, failed_actions):
+    output = stock_api.handle_stock_actions(SimpleNamespace(actions=failed_actions), 'DELISTED')
+    assert output.endswith("No actions found for ticker DELISTED.\n")
+
+
+def test_fetch_and_format_stock_info_prints_the_fetching_line(stock_api, monkeypatch, capsys):
+    monkeypatch.setattr('main.yf.Ticker', lambda ticker_symbol: SimpleNamespace(actions=pd.DataFrame()))
+    stock_api.fetch_and_format_stock_info('NVDA')
+    assert capsys.readouterr().out.splitlines() == [
+        "Fetching and formatting stock information for NVDA",
+        "Ticker: NVDA",
+        "No actions found for ticker NVDA.",
+    ]
+
+
+def test_format_stock_info_reports_a_failed_fetch(stock_api, monkeypatch):
+    def ticker(ticker_symbol):
+        raise ConnectionError('connection reset')
+
+    monkeypatch.setattr('main.yf.Ticker', ticker)
+    assert stock_api.format_stock_info('NVDA').splitlines() == [
+        "Fetching and formatting stock information for NVDA",
+        "Couldn't fetch the stock information for NVDA: connection reset",
+    ]
+
+
+def test_get_organized_stock_actions_keeps_non_zero_actions(stock_api):
+    index = pd.DatetimeIndex(['2023-06-08', '2024-03-05', '2024-06-10'], name='Date').tz_localize('America/New_York')
+    actions = pd.DataFrame({'Dividends': [0.04, float('nan'), 0.0], 'Stock Splits': [0.0, 0.0, 10.0]}, index=index)
+
+    actions_df = stock_api.get_organized_stock_actions(actions)
+
+    assert list(actions_df.columns) == ['type', 'date', 'value']
+    assert actions_df[['type', 'date']].values.tolist() == [
+        ['Dividends', '2023-06-08'],
+        ['Dividends', '2024-03-05'],
+        ['Stock Splits', '2024-06-10'],
+    ]
+    assert actions_df['value'].tolist()[0::2] == [0.04, 10.0]
+    assert pd.isna(actions_df['value'][1])
+
+
+def test_get_organized_stock_actions_orders_types_by_first_action(stock_api):
+    index = pd.DatetimeIndex(['2021-07-20', '2022-09-01', '2022-12-01'], name='Date').tz_localize('America/New_York')
+    actions = pd.DataFrame({'Dividends': [0.0, 0.04, 0.04], 'Stock Splits': [4.0, 0.0, 0.0]}, index=index)
+
+    actions_df = stock_api.get_organized_stock_actions(actions)
+
+    assert actions_df['type'].tolist() == ['Stock Splits', 'Dividends', 'Dividends']
+
+
+@pytest.mark.parametrize('actions', [
+    pd.DataFrame(),
+    pd.DataFrame({'Dividends': [0.0, 0.0], 'Stock Splits': [0.0, 0.0]},
+                 index=pd.DatetimeIndex(['2023-06-08', '2024-06-10'], name='Date')),
+])
+def test_get_organized_stock_actions_without_actions_returns_none(stock_api, actions):
+    assert stock_api.get_organized_stock_actions(actions) is None
+
+
+def test_get_organized_stock_actions_handles_mixed_dtypes(stock_api):
+    index = pd.DatetimeIndex(['2023-06-08', '2024-06-10'], name='Date')
+    actions = pd.DataFrame({'Dividends': [0.04, 0.0], 'Stock Splits': [0, 10]}, index=index)
+
+    actions_df = stock_api.get_organized_stock_actions(actions)
+
+    assert actions_df.values.tolist() == [['Dividends', '2023-06-08', 0.04], ['Stock Splits', '2024-06-10', 10.0]]